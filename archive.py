@@ -0,0 +1,244 @@
+import argparse
+from datetime import datetime
+
+from database import ARCHIVE_DB_NAME, get_connection
+
+ARCHIVE_SCHEMA = "archive"
+ARCHIVE_BATCH_SIZE = 50
+
+# Child tables first, employees last, so foreign keys stay satisfied while
+# rows are deleted from the hot tables.
+EMPLOYEE_TABLES = [
+    "offers",
+    "employee_documents",
+    "employee_roles",
+    "employee_assets",
+    "employee_access",
+    "employee_trainings",
+    "employee_projects",
+    "resignations",
+    "exit_interviews",
+    "clearance_checklist",
+    "workflow_tasks",
+    "employees",
+]
+
+
+# -------------------- ARCHIVE SCHEMA --------------------
+def attach_archive(conn, path=ARCHIVE_DB_NAME):
+    attached = [row[1] for row in conn.execute("PRAGMA database_list;")]
+    if ARCHIVE_SCHEMA not in attached:
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+    _create_archive_tables(conn)
+    return conn
+
+
+def _columns(conn, schema, table):
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({table});")]
+
+
+def _create_archive_tables(conn):
+    # Same columns as the hot tables but no foreign keys: lookup tables like
+    # departments and assets stay in the main database only. Columns added
+    # to a hot table later are added to its archive table on the next attach.
+    for table in EMPLOYEE_TABLES:
+        columns = conn.execute(f"PRAGMA main.table_info({table});").fetchall()
+        existing = _columns(conn, ARCHIVE_SCHEMA, table)
+        if not existing:
+            col_defs = []
+            for _, name, col_type, _, _, pk in columns:
+                col_defs.append(f"{name} {col_type}{' PRIMARY KEY' if pk else ''}")
+            conn.execute(f"CREATE TABLE {ARCHIVE_SCHEMA}.{table} ({', '.join(col_defs)});")
+        else:
+            for _, name, col_type, _, _, _ in columns:
+                if name not in existing:
+                    conn.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.{table} ADD COLUMN {name} {col_type};")
+        if table != "employees":
+            conn.execute(
+                f"CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_{table}_employee_id "
+                f"ON {table}(employee_id);"
+            )
+    _create_reporting_history(conn)
+    conn.commit()
+
+
+def get_history_connection():
+    # Connection for the rare historical query: exposes <table>_all views
+    # that union the hot rows with the archived ones.
+    conn = attach_archive(get_connection())
+    for table in EMPLOYEE_TABLES:
+        cols = ", ".join(_columns(conn, "main", table))
+        conn.execute(f"""
+        CREATE TEMP VIEW IF NOT EXISTS {table}_all AS
+        SELECT {cols} FROM main.{table}
+        UNION ALL
+        SELECT {cols} FROM {ARCHIVE_SCHEMA}.{table}
+        """)
+    return conn
+
+
+# -------------------- ARCHIVAL JOB --------------------
+def archivable_employees(conn, limit, reassign_reports=False):
+    # Fully offboarded: clearance completed and last working day passed.
+    # Unless reassign_reports is set, managers with reports still in the hot
+    # table stay hot (see held_back_managers()).
+    manager_guard = "" if reassign_reports else """
+      AND NOT EXISTS (
+          SELECT 1 FROM employees r
+          WHERE r.manager_id = e.employee_id
+            AND r.employee_id != e.employee_id
+      )"""
+    rows = conn.execute(f"""
+    SELECT DISTINCT e.employee_id
+    FROM employees e
+    JOIN clearance_checklist c ON c.employee_id = e.employee_id
+    WHERE c.completed_at IS NOT NULL
+      AND (e.last_working_date IS NULL OR e.last_working_date <= date('now'))
+      {manager_guard}
+    LIMIT ?
+    """, (limit,)).fetchall()
+    return [row[0] for row in rows]
+
+
+def held_back_managers(conn):
+    # Offboarded employees kept hot only because someone still reports to them
+    rows = conn.execute("""
+    SELECT DISTINCT e.employee_id,
+           (SELECT COUNT(*) FROM employees r
+            WHERE r.manager_id = e.employee_id AND r.employee_id != e.employee_id) AS reports
+    FROM employees e
+    JOIN clearance_checklist c ON c.employee_id = e.employee_id
+    WHERE c.completed_at IS NOT NULL
+      AND (e.last_working_date IS NULL OR e.last_working_date <= date('now'))
+      AND reports > 0
+    ORDER BY e.employee_id
+    """).fetchall()
+    return rows
+
+
+def _create_reporting_history(conn):
+    conn.execute(f"""
+    CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.reporting_history (
+        employee_id TEXT,
+        old_manager_id TEXT,
+        new_manager_id TEXT,
+        changed_at TEXT
+    );
+    """)
+
+
+def _reassign_reports(conn, employee_ids, placeholders):
+    # Only with reassign_reports: reports of an exited manager move up to
+    # that manager's own manager (NULL if that one is archived in the same
+    # batch). The previous line is kept in archive.reporting_history.
+    new_manager = f"""(
+        SELECT CASE WHEN m.manager_id IN ({placeholders}) THEN NULL ELSE m.manager_id END
+        FROM main.employees m
+        WHERE m.employee_id = employees.manager_id
+    )"""
+    where = f"""
+    WHERE manager_id IN ({placeholders})
+      AND employee_id NOT IN ({placeholders})"""
+    conn.execute(f"""
+    INSERT INTO {ARCHIVE_SCHEMA}.reporting_history
+    SELECT employee_id, manager_id, {new_manager}, datetime('now')
+    FROM main.employees {where}
+    """, employee_ids * 3)
+    return conn.execute(f"""
+    UPDATE main.employees
+    SET manager_id = {new_manager}, updated_at = ?
+    {where}
+    """, employee_ids + [str(datetime.now())] + employee_ids * 2).rowcount
+
+
+def _release_assets(conn, employee_ids, placeholders):
+    # Assets the archived employee still holds, with assets cleared on their
+    # checklist, are marked returned on their own row (before it is copied
+    # to the archive) and go back to the pool if nobody else holds them.
+    cleared = f"""
+    employee_id IN ({placeholders})
+    AND returned_date IS NULL
+    AND employee_id IN (
+        SELECT employee_id FROM main.clearance_checklist
+        WHERE asset_cleared = 1 AND laptop_returned = 1
+    )"""
+    released = conn.execute(f"""
+    UPDATE main.assets
+    SET status = 'Available'
+    WHERE status = 'Assigned'
+      AND asset_id IN (SELECT asset_id FROM main.employee_assets WHERE {cleared})
+      AND NOT EXISTS (
+        SELECT 1 FROM main.employee_assets ea
+        WHERE ea.asset_id = assets.asset_id
+          AND ea.employee_id NOT IN ({placeholders})
+          AND ea.returned_date IS NULL
+    )
+    """, employee_ids * 2).rowcount
+    conn.execute(f"""
+    UPDATE main.employee_assets
+    SET returned_date = COALESCE(
+            (SELECT last_working_date FROM main.employees e
+             WHERE e.employee_id = employee_assets.employee_id),
+            date('now')
+        ),
+        asset_status = 'Returned'
+    WHERE {cleared}
+    """, employee_ids)
+    return released
+
+
+def _archive_batch(conn, employee_ids, reassign_reports=False):
+    placeholders = ",".join("?" * len(employee_ids))
+    with conn:
+        reassigned = _reassign_reports(conn, employee_ids, placeholders) if reassign_reports else 0
+        released = _release_assets(conn, employee_ids, placeholders)
+        for table in EMPLOYEE_TABLES:
+            cols = ", ".join(_columns(conn, "main", table))
+            conn.execute(
+                f"INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.{table} ({cols}) "
+                f"SELECT {cols} FROM main.{table} WHERE employee_id IN ({placeholders})",
+                employee_ids,
+            )
+            conn.execute(
+                f"DELETE FROM main.{table} WHERE employee_id IN ({placeholders})",
+                employee_ids,
+            )
+    return reassigned, released
+
+
+def archive_exited_employees(batch_size=ARCHIVE_BATCH_SIZE, path=ARCHIVE_DB_NAME, reassign_reports=False):
+    conn = attach_archive(get_connection(), path)
+    stats = {"archived": 0, "reports_reassigned": 0, "assets_released": 0}
+    try:
+        while True:
+            employee_ids = archivable_employees(conn, batch_size, reassign_reports)
+            if not employee_ids:
+                break
+            reassigned, released = _archive_batch(conn, employee_ids, reassign_reports)
+            stats["archived"] += len(employee_ids)
+            stats["reports_reassigned"] += reassigned
+            stats["assets_released"] += released
+        stats["held_back"] = held_back_managers(conn)
+    finally:
+        conn.close()
+    return stats
+
+
+# -------------------- CLI --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Move offboarded employees to the archive database")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    parser.add_argument("--archive", default=ARCHIVE_DB_NAME)
+    parser.add_argument("--reassign-reports", action="store_true",
+                        help="Archive exited managers too, moving their reports to the next manager up "
+                             "(old lines are kept in archive.reporting_history)")
+    args = parser.parse_args(argv)
+    stats = archive_exited_employees(args.batch_size, args.archive, args.reassign_reports)
+    print(f"Archived {stats['archived']} employees, reassigned {stats['reports_reassigned']} "
+          f"reports, released {stats['assets_released']} assets")
+    for employee_id, reports in stats["held_back"]:
+        print(f"  kept hot: {employee_id} still has {reports} active report(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,6 +3,7 @@ from datetime import datetime, timedelta
 import random
 
 DB_NAME = "hr_lifecycle.db"
+ARCHIVE_DB_NAME = "hr_archive.db"
 
 def get_connection():
     conn = sqlite3.connect(DB_NAME, check_same_thread=False)
@@ -33,6 +34,7 @@ def create_tables():
     """)
     cursor.execute("SELECT value FROM metadata WHERE key='initialized'")
     if cursor.fetchone():
+        create_indexes(conn)
         conn.close()
         return
 
@@ -274,12 +276,28 @@ def create_tables():
     """)
 
     conn.commit()
+    create_indexes(conn)
     insert_sample_data(conn)
     cursor.execute("INSERT INTO metadata VALUES ('initialized','true')")
     conn.commit()
     conn.close()
 
 
+# -------------------- INDEXES --------------------
+def create_indexes(conn):
+    cursor = conn.cursor()
+    # Per-employee document checklist lookups
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_employee_documents_employee_type
+    ON employee_documents(employee_id, document_type_id);
+    """)
+    cursor.execute("""
+    CREATE INDEX IF NOT EXISTS idx_document_types_mandatory_stage
+    ON document_types(mandatory_for, required_stage);
+    """)
+    conn.commit()
+
+
 # -------------------- SAMPLE DATA --------------------
 def insert_sample_data(conn):
     cursor = conn.cursor()
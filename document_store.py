@@ -0,0 +1,320 @@
+import argparse
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from database import get_connection
+
+STORE_DIR = "document_store"
+CHUNK_SIZE = 64 * 1024
+MAX_DOCUMENT_SIZE = 20 * 1024 * 1024
+INGEST_WORKERS = 4
+ALLOWED_EXTENSIONS = {".pdf", ".png", ".jpg", ".jpeg"}
+# One spelling per format so the same bytes always map to the same blob
+EXTENSION_ALIASES = {".jpeg": ".jpg"}
+GC_GRACE_SECONDS = 3600
+
+
+class DocumentTooLarge(ValueError):
+    pass
+
+
+# -------------------- CONTENT-ADDRESSED STORAGE --------------------
+def blob_path(digest, ext, store_dir=STORE_DIR):
+    # Sharded by the first two hex chars so no directory grows unbounded
+    return os.path.join(store_dir, digest[:2], f"{digest}{ext}")
+
+
+def store_blob(fileobj, ext, store_dir=STORE_DIR, max_size=MAX_DOCUMENT_SIZE):
+    # Hashes while copying chunk by chunk into a temp file inside the store,
+    # then renames it to its SHA-256 name. Duplicate content is discarded.
+    ext = ext.lower()
+    if ext not in ALLOWED_EXTENSIONS:
+        raise ValueError(f"Unsupported document type: {ext}")
+    ext = EXTENSION_ALIASES.get(ext, ext)
+    os.makedirs(store_dir, exist_ok=True)
+
+    sha = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=store_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            for chunk in iter(lambda: fileobj.read(CHUNK_SIZE), b""):
+                size += len(chunk)
+                if size > max_size:
+                    raise DocumentTooLarge(f"Document exceeds {max_size} bytes")
+                sha.update(chunk)
+                tmp.write(chunk)
+        digest = sha.hexdigest()
+        path = blob_path(digest, ext, store_dir)
+        if os.path.exists(path):
+            # Touch the existing blob so collect_garbage() treats it as fresh
+            # until this upload's row is committed.
+            os.remove(tmp_path)
+            os.utime(path)
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return path, digest, size
+
+
+def hash_file(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def verify_blob(path):
+    # The file name is the expected digest, so integrity needs no extra column
+    if not os.path.exists(path):
+        return False
+    expected = os.path.splitext(os.path.basename(path))[0]
+    return hash_file(path) == expected
+
+
+# -------------------- EMPLOYEE DOCUMENTS --------------------
+def _check_references(conn, employee_id, document_type_id):
+    # Checked before anything is written to the store so a bad id does not
+    # leave an unreferenced blob behind.
+    if not conn.execute("SELECT 1 FROM employees WHERE employee_id = ?", (employee_id,)).fetchone():
+        raise ValueError(f"Unknown employee: {employee_id}")
+    if not conn.execute(
+        "SELECT 1 FROM document_types WHERE document_type_id = ?", (document_type_id,)
+    ).fetchone():
+        raise ValueError(f"Unknown document type: {document_type_id}")
+
+
+def _record_document(conn, employee_id, document_type_id, path, digest):
+    # One row per distinct upload so history is kept; re-uploading the same
+    # content for the same type only bumps uploaded_at and keeps HR's
+    # verification.
+    conn.execute("""
+    INSERT INTO employee_documents (
+        emp_doc_id, employee_id, document_type_id, file_path,
+        verification_status, uploaded_at, verified_by
+    ) VALUES (?,?,?,?,?,?,?)
+    ON CONFLICT(emp_doc_id) DO UPDATE SET uploaded_at = excluded.uploaded_at
+    """, (
+        f"emp_doc_{employee_id}_{document_type_id}_{digest[:16]}",
+        employee_id,
+        document_type_id,
+        path,
+        "Pending",
+        str(datetime.now()),
+        None
+    ))
+
+
+def upload_document(employee_id, document_type_id, fileobj, ext):
+    conn = get_connection()
+    try:
+        _check_references(conn, employee_id, document_type_id)
+        path, digest, _ = store_blob(fileobj, ext)
+        _record_document(conn, employee_id, document_type_id, path, digest)
+        conn.commit()
+    finally:
+        conn.close()
+    return path
+
+
+def verify_employee_documents(employee_id, store_dir=STORE_DIR):
+    # Re-hashes every stored file for the employee. Mismatches are flagged
+    # Corrupted/Missing and a file that verifies again goes back to Pending.
+    # Paths outside the store (hand-entered rows) are left untouched.
+    store_root = os.path.abspath(store_dir) + os.sep
+    conn = get_connection()
+    results = {}
+    try:
+        rows = conn.execute(
+            "SELECT emp_doc_id, file_path, verification_status FROM employee_documents WHERE employee_id = ?",
+            (employee_id,)
+        ).fetchall()
+        for emp_doc_id, path, current in rows:
+            if not path or not os.path.abspath(path).startswith(store_root):
+                results[emp_doc_id] = None
+                continue
+            ok = verify_blob(path)
+            results[emp_doc_id] = ok
+            if ok:
+                status = "Pending" if current in ("Corrupted", "Missing") else current
+            else:
+                status = "Corrupted" if os.path.exists(path) else "Missing"
+            if status != current:
+                conn.execute(
+                    "UPDATE employee_documents SET verification_status = ? WHERE emp_doc_id = ?",
+                    (status, emp_doc_id)
+                )
+        conn.commit()
+    finally:
+        conn.close()
+    return results
+
+
+# -------------------- BATCH INGEST --------------------
+def _ingest_one(item):
+    employee_id, document_type_id, src_path = item
+    ext = os.path.splitext(src_path)[1]
+    with open(src_path, "rb") as f:
+        path, digest, _ = store_blob(f, ext)
+    return item, path, digest
+
+
+def ingest_batch(items, workers=INGEST_WORKERS):
+    # Hashing and copying run in the thread pool; the DB rows are written
+    # from this thread in one transaction since SQLite has a single writer.
+    failed = []
+    conn = get_connection()
+    try:
+        valid = []
+        for item in items:
+            try:
+                _check_references(conn, item[0], item[1])
+                valid.append(item)
+            except ValueError as e:
+                failed.append((item, str(e)))
+
+        stored = []
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [(item, pool.submit(_ingest_one, item)) for item in valid]
+            for item, future in futures:
+                try:
+                    stored.append(future.result())
+                except (OSError, ValueError) as e:
+                    failed.append((item, str(e)))
+
+        recorded = []
+        with conn:
+            for item, path, digest in stored:
+                try:
+                    _record_document(conn, item[0], item[1], path, digest)
+                    recorded.append((item[0], item[1], path))
+                except sqlite3.IntegrityError as e:
+                    failed.append((item, str(e)))
+    finally:
+        conn.close()
+    return recorded, failed
+
+
+def collect_garbage(store_dir=STORE_DIR, grace=GC_GRACE_SECONDS):
+    # Blobs whose row insert failed are left in place and removed here.
+    # Only blobs untouched for `grace` seconds are candidates (store_blob
+    # touches a blob on every upload), and the check and delete run under
+    # the write lock so no row can be committed against a blob mid-delete.
+    if not os.path.isdir(store_dir):
+        return []
+    cutoff = time.time() - grace
+    candidates = []
+    for root, _, files in os.walk(store_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            if os.path.getmtime(path) < cutoff:
+                candidates.append(path)
+
+    removed = []
+    conn = get_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE;")
+        for path in candidates:
+            if path.endswith(".part") or not conn.execute(
+                "SELECT 1 FROM employee_documents WHERE file_path = ?", (path,)
+            ).fetchone():
+                os.remove(path)
+                removed.append(path)
+        conn.commit()
+    finally:
+        conn.close()
+    return removed
+
+
+def scan_drop_folder(folder):
+    # Files are named <employee_id>__<document_type_id>.<ext>
+    items = []
+    for name in sorted(os.listdir(folder)):
+        stem, _ = os.path.splitext(name)
+        if "__" not in stem:
+            continue
+        employee_id, document_type_id = stem.split("__", 1)
+        items.append((employee_id, document_type_id, os.path.join(folder, name)))
+    return items
+
+
+# -------------------- CHECKLIST --------------------
+def document_checklist(conn, employee_id, stage=None):
+    # Document types required for the employee (ALL or their employee_type)
+    # with the latest upload, if any.
+    query = """
+    SELECT dt.document_type_id, dt.name, dt.required_stage,
+           ed.file_path, ed.verification_status, ed.uploaded_at
+    FROM employees e
+    JOIN document_types dt ON dt.mandatory_for IN ('ALL', e.employee_type)
+    LEFT JOIN employee_documents ed
+           ON ed.employee_id = e.employee_id
+          AND ed.document_type_id = dt.document_type_id
+          AND ed.emp_doc_id = (
+              SELECT emp_doc_id FROM employee_documents
+              WHERE employee_id = e.employee_id AND document_type_id = dt.document_type_id
+              ORDER BY uploaded_at DESC, rowid DESC
+              LIMIT 1
+          )
+    WHERE e.employee_id = ?
+    """
+    params = [employee_id]
+    if stage:
+        query += " AND dt.required_stage = ?"
+        params.append(stage)
+    query += " ORDER BY dt.document_type_id"
+    return conn.execute(query, params).fetchall()
+
+
+# -------------------- CLI --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Employee document store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("ingest", help="Ingest a folder of <employee_id>__<document_type_id>.<ext> files")
+    p.add_argument("folder")
+    p.add_argument("--workers", type=int, default=INGEST_WORKERS)
+
+    p = sub.add_parser("verify", help="Re-hash an employee's stored documents")
+    p.add_argument("employee_id")
+
+    p = sub.add_parser("gc", help="Remove stored files no document row points to")
+    p.add_argument("--grace", type=int, default=GC_GRACE_SECONDS,
+                   help="Only remove files untouched for this many seconds")
+
+    p = sub.add_parser("checklist", help="Mandatory documents and their status")
+    p.add_argument("employee_id")
+    p.add_argument("--stage")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "ingest":
+        stored, failed = ingest_batch(scan_drop_folder(args.folder), args.workers)
+        print(f"Stored {len(stored)} documents, {len(failed)} failed")
+        for item, error in failed:
+            print(f"  {item[2]}: {error}")
+    elif args.command == "verify":
+        for emp_doc_id, ok in verify_employee_documents(args.employee_id).items():
+            print(f"{emp_doc_id}: {'SKIPPED' if ok is None else 'OK' if ok else 'MISMATCH'}")
+    elif args.command == "gc":
+        for path in collect_garbage(grace=args.grace):
+            print(f"Removed {path}")
+    elif args.command == "checklist":
+        conn = get_connection()
+        for row in document_checklist(conn, args.employee_id, args.stage):
+            print(row)
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
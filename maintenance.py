@@ -0,0 +1,323 @@
+import argparse
+import os
+import sqlite3
+import time
+from datetime import datetime
+from urllib.parse import quote
+
+from archive import ARCHIVE_SCHEMA
+from database import ARCHIVE_DB_NAME, DB_NAME, get_connection
+
+BACKUP_DIR = "backups"
+BACKUP_PAGES_PER_STEP = 256
+BACKUP_STEP_SLEEP = 0.05
+BACKUP_RETENTION = 7
+VACUUM_PAGES_PER_STEP = 128
+VACUUM_STEP_SLEEP = 0.05
+ANALYSIS_LIMIT = 400
+
+
+# -------------------- SNAPSHOT / RESTORE --------------------
+def _copy_database(src, dst, pages, sleep, progress=None, name="main"):
+    # Copies a few pages at a time and sleeps in between so no single step
+    # holds the source for long.
+    def _step(status, remaining, total):
+        if progress:
+            progress(total - remaining, total)
+        time.sleep(sleep)
+
+    src.backup(dst, pages=pages, progress=_step, name=name)
+
+
+def _copy_to_file(src, dest, pages, sleep, progress=None, name="main"):
+    # Writes to dest.part and only renames on success, so a failed copy
+    # never leaves a half-written file behind at dest.
+    part = dest + ".part"
+    if os.path.exists(part):
+        os.remove(part)
+    dst = sqlite3.connect(part)
+    try:
+        _copy_database(src, dst, pages, sleep, progress, name)
+        dst.close()
+        os.replace(part, dest)
+    except BaseException:
+        dst.close()
+        if os.path.exists(part):
+            os.remove(part)
+        raise
+
+
+def archive_snapshot_path(path):
+    # hr_lifecycle_<stamp>.db -> hr_lifecycle_<stamp>.archive.db
+    root, ext = os.path.splitext(path)
+    return f"{root}.archive{ext}"
+
+
+def snapshot(dest=None, pages=BACKUP_PAGES_PER_STEP, sleep=BACKUP_STEP_SLEEP, progress=None):
+    if dest is None:
+        os.makedirs(BACKUP_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+        dest = os.path.join(BACKUP_DIR, f"hr_lifecycle_{stamp}.db")
+    # Offboarded employees only live in the archive once archive.py has run,
+    # so it is copied alongside the main database under the same read
+    # transaction.
+    with_archive = os.path.exists(ARCHIVE_DB_NAME)
+    archive_dest = archive_snapshot_path(dest)
+    for path in [dest, archive_dest] if with_archive else [dest]:
+        if os.path.exists(path):
+            raise FileExistsError(f"Snapshot target already exists: {path}")
+
+    src = get_connection()
+    try:
+        schemas = ["main"]
+        if with_archive:
+            src.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (ARCHIVE_DB_NAME,))
+            schemas.append(ARCHIVE_SCHEMA)
+        # In WAL mode an open read transaction pins a consistent view of the
+        # database: app writes keep committing to the WAL and no longer
+        # restart the page-stepped copy from page 0.
+        for schema in schemas:
+            mode = src.execute(f"PRAGMA {schema}.journal_mode = WAL;").fetchone()[0]
+            if mode.lower() != "wal":
+                raise sqlite3.OperationalError(f"Could not switch {schema} to WAL (journal_mode={mode})")
+        src.execute("BEGIN;")
+        for schema in schemas:
+            src.execute(f"SELECT COUNT(*) FROM {schema}.sqlite_master;").fetchone()
+        try:
+            _copy_to_file(src, dest, pages, sleep, progress)
+            if with_archive:
+                try:
+                    _copy_to_file(src, archive_dest, pages, sleep, progress, name=ARCHIVE_SCHEMA)
+                except BaseException:
+                    os.remove(dest)
+                    raise
+        finally:
+            src.rollback()
+    finally:
+        src.close()
+    return dest
+
+
+def prune_snapshots(keep=BACKUP_RETENTION, backup_dir=BACKUP_DIR):
+    # Keeps the newest `keep` snapshots in backup_dir; the timestamped
+    # names sort chronologically.
+    if not os.path.isdir(backup_dir):
+        return []
+    names = sorted(
+        name for name in os.listdir(backup_dir)
+        if name.startswith("hr_lifecycle_") and name.endswith(".db")
+        and not name.endswith(".archive.db")
+    )
+    removed = []
+    for name in names[:max(len(names) - keep, 0)]:
+        path = os.path.join(backup_dir, name)
+        for p in (path, archive_snapshot_path(path)):
+            if os.path.exists(p):
+                os.remove(p)
+                removed.append(p)
+    return removed
+
+
+def _restore_file(snapshot_path, dest, pages, sleep, progress):
+    src = sqlite3.connect(f"file:{quote(os.path.abspath(snapshot_path))}?mode=ro", uri=True)
+    try:
+        result = src.execute("PRAGMA integrity_check;").fetchone()[0]
+        if result != "ok":
+            raise sqlite3.DatabaseError(f"Snapshot failed integrity check: {result}")
+        _copy_to_file(src, dest, pages, sleep, progress)
+    finally:
+        src.close()
+
+
+def restore(snapshot_path, dest, pages=BACKUP_PAGES_PER_STEP, sleep=0, progress=None):
+    # The archive snapshot, if one was taken, is restored next to dest as
+    # <dest>.archive.db; rename it to the archive database name to use it.
+    if not os.path.exists(snapshot_path):
+        raise FileNotFoundError(f"Snapshot not found: {snapshot_path}")
+    archive_src = archive_snapshot_path(snapshot_path)
+    archive_dest = archive_snapshot_path(dest)
+    with_archive = os.path.exists(archive_src)
+    for path in [dest, archive_dest] if with_archive else [dest]:
+        if os.path.exists(path):
+            raise FileExistsError(f"Restore target already exists: {path}")
+
+    _restore_file(snapshot_path, dest, pages, sleep, progress)
+    if with_archive:
+        try:
+            _restore_file(archive_src, archive_dest, pages, sleep, progress)
+        except BaseException:
+            os.remove(dest)
+            raise
+    return dest
+
+
+# -------------------- VACUUM / ANALYZE --------------------
+def enable_incremental_vacuum(conn):
+    # auto_vacuum only takes effect after one full VACUUM, so this is a
+    # one-off migration; afterwards incremental_vacuum() never rewrites
+    # the whole file.
+    mode = conn.execute("PRAGMA auto_vacuum;").fetchone()[0]
+    if mode == 2:
+        return False
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+    conn.execute("VACUUM;")
+    return True
+
+
+def incremental_vacuum(conn, pages=VACUUM_PAGES_PER_STEP, sleep=VACUUM_STEP_SLEEP):
+    # incremental_vacuum is a no-op unless auto_vacuum is INCREMENTAL; see
+    # enable_incremental_vacuum() for the one-off switch.
+    if conn.execute("PRAGMA auto_vacuum;").fetchone()[0] != 2:
+        return 0
+    freed = 0
+    free = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+    while free:
+        conn.execute(f"PRAGMA incremental_vacuum({min(free, pages)});").fetchall()
+        remaining = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+        if remaining >= free:
+            break
+        freed += free - remaining
+        free = remaining
+        time.sleep(sleep)
+    return freed
+
+
+def analyze(conn, full=False):
+    # Scheduled runs only sample each index (analysis_limit) and let
+    # PRAGMA optimize decide what needs it; a full ANALYZE scans every
+    # table under a write lock, so it is only run on demand.
+    if full:
+        conn.execute("ANALYZE;")
+    else:
+        conn.execute(f"PRAGMA analysis_limit = {ANALYSIS_LIMIT};")
+        conn.execute("PRAGMA optimize;")
+    conn.commit()
+
+
+# -------------------- REPORT --------------------
+def _file_stats(conn, path):
+    page_size = conn.execute("PRAGMA page_size;").fetchone()[0]
+    page_count = conn.execute("PRAGMA page_count;").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count;").fetchone()[0]
+    auto_vacuum = conn.execute("PRAGMA auto_vacuum;").fetchone()[0]
+    wal_path = path + "-wal"
+    return {
+        "file_size": os.path.getsize(path) if os.path.exists(path) else 0,
+        "wal_size": os.path.getsize(wal_path) if os.path.exists(wal_path) else 0,
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist_count,
+        "freelist_size": freelist_count * page_size,
+        "fragmentation": round(freelist_count / page_count, 4) if page_count else 0.0,
+        "auto_vacuum": {0: "NONE", 1: "FULL", 2: "INCREMENTAL"}.get(auto_vacuum, auto_vacuum),
+    }
+
+
+def report(conn=None, path=DB_NAME, archive_path=ARCHIVE_DB_NAME):
+    own_conn = conn is None
+    if own_conn:
+        conn = get_connection()
+    stats = _file_stats(conn, path)
+    if own_conn:
+        conn.close()
+
+    if archive_path and os.path.exists(archive_path):
+        archive_conn = sqlite3.connect(archive_path)
+        try:
+            stats["archive"] = _file_stats(archive_conn, archive_path)
+        finally:
+            archive_conn.close()
+    return stats
+
+
+def run_maintenance(full_analyze=False):
+    conn = get_connection()
+    try:
+        freed = incremental_vacuum(conn)
+        analyze(conn, full=full_analyze)
+        stats = report(conn)
+    finally:
+        conn.close()
+    stats["pages_freed"] = freed
+    return stats
+
+
+def run_schedule(interval, snapshot_every=0, keep=BACKUP_RETENTION):
+    # A failed run (e.g. "database is locked" while the app holds the write
+    # lock) is logged and retried on the next tick instead of ending the loop.
+    runs = 0
+    while True:
+        runs += 1
+        try:
+            stats = run_maintenance()
+            if snapshot_every and runs % snapshot_every == 0:
+                stats["snapshot"] = snapshot()
+                stats["pruned"] = prune_snapshots(keep)
+            print(f"[{datetime.now()}] {stats}", flush=True)
+        except (sqlite3.Error, OSError) as e:
+            print(f"[{datetime.now()}] maintenance run {runs} failed: {e!r}", flush=True)
+        time.sleep(interval)
+
+
+# -------------------- CLI --------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=f"Maintenance tasks for {DB_NAME}")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    snapshot_help = (
+        f"Online backup of {DB_NAME} (and {ARCHIVE_DB_NAME} as <dest>.archive.db if present). "
+        "The first snapshot permanently switches them to journal_mode=WAL (adds -wal/-shm files)"
+    )
+    p = sub.add_parser("snapshot", help=snapshot_help, description=snapshot_help)
+    p.add_argument("--dest")
+    p.add_argument("--pages", type=int, default=BACKUP_PAGES_PER_STEP)
+    p.add_argument("--keep", type=int,
+                   help=f"Afterwards keep only the newest N snapshots in {BACKUP_DIR}/")
+
+    p = sub.add_parser("restore", help=(
+        "Restore a snapshot into a fresh file; an archive snapshot is restored "
+        "alongside as <dest>.archive.db"
+    ))
+    p.add_argument("snapshot")
+    p.add_argument("dest")
+
+    sub.add_parser("enable-incremental", help="One-off switch to auto_vacuum=INCREMENTAL")
+    p = sub.add_parser("vacuum", help="Incremental VACUUM followed by ANALYZE")
+    p.add_argument("--full-analyze", action="store_true",
+                   help="Run a full ANALYZE instead of the sampled PRAGMA optimize")
+    sub.add_parser("report", help="File, freelist and fragmentation stats")
+
+    p = sub.add_parser("schedule", help="Run vacuum/analyze every INTERVAL seconds")
+    p.add_argument("--interval", type=int, default=3600)
+    p.add_argument("--snapshot-every", type=int, default=0,
+                   help="Also take a snapshot every N runs (0 = never)")
+    p.add_argument("--keep", type=int, default=BACKUP_RETENTION,
+                   help="Number of scheduled snapshots to keep")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "snapshot":
+        print(snapshot(args.dest, pages=args.pages))
+        if args.keep is not None:
+            for path in prune_snapshots(args.keep):
+                print(f"Removed {path}")
+    elif args.command == "restore":
+        print(restore(args.snapshot, args.dest))
+    elif args.command == "enable-incremental":
+        conn = get_connection()
+        changed = enable_incremental_vacuum(conn)
+        conn.close()
+        print("auto_vacuum set to INCREMENTAL" if changed else "auto_vacuum already INCREMENTAL")
+    elif args.command == "vacuum":
+        stats = run_maintenance(args.full_analyze)
+        print(stats)
+        if stats["auto_vacuum"] != "INCREMENTAL":
+            print("Free pages are only reclaimed with auto_vacuum=INCREMENTAL; run enable-incremental once")
+    elif args.command == "report":
+        print(report())
+    elif args.command == "schedule":
+        run_schedule(args.interval, args.snapshot_every, args.keep)
+
+
+if __name__ == "__main__":
+    main()